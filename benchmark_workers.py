@@ -0,0 +1,202 @@
+# benchmark_workers.py - Throughput and memory of main.py as the number of web workers grows.
+#
+# Usage: python benchmark_workers.py --max-workers 4
+#
+# The script first measures the single-process layout (`main.py`, models loaded in-process)
+# as a baseline. Then, for each worker count, it starts `main.py --shared-inference
+# --workers N`, so every row from 1 to N uses the same shared-inference layout and only the
+# worker count changes. Each run checks that a queued Gradio event on the chat UI completes,
+# loads /api/search from several client threads, and sums memory over the server's whole
+# process tree. RSS counts
+# shared pages once per process; PSS splits them between the processes that map them, so
+# PSS is the figure that shows what the shared inference process and mapped index save.
+# Memory is read from /proc, so this runs on Linux only. The app still needs its usual
+# API keys in .env to start.
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+QUERIES = [
+    "PM Kisan yojana kya hai?",
+    "Fasal bima ke liye kaise apply karein?",
+    "Kisan credit card ka byaaj kitna hai?",
+    "Soil health card kahan milega?",
+    "Ayushman Bharat mein kaun shaamil hai?",
+]
+
+
+def _child_pids(pid: int) -> list[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, so split after its closing bracket.
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def process_tree(root_pid: int) -> list[int]:
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(_child_pids(pid))
+    return pids
+
+
+def tree_memory_mb(root_pid: int) -> tuple[float, float]:
+    """Returns (RSS, PSS) in MB summed over the process tree."""
+    rss_kb = pss_kb = 0
+    for pid in process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Rss:"):
+                        rss_kb += int(line.split()[1])
+                    elif line.startswith("Pss:"):
+                        pss_kb += int(line.split()[1])
+        except OSError:
+            continue  # Process exited while we were walking the tree.
+    return rss_kb / 1024, pss_kb / 1024
+
+
+def wait_until_ready(urls: list[str], server: subprocess.Popen, timeout: float) -> bool:
+    """Waits until every URL answers 200; the UI and API workers start independently."""
+    deadline = time.monotonic() + timeout
+    pending = list(urls)
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            return False
+        try:
+            pending = [url for url in pending if httpx.get(url, timeout=5.0).status_code != 200]
+        except httpx.HTTPError:
+            pass
+        if not pending:
+            return True
+        time.sleep(1.0)
+    return False
+
+
+def check_gradio_queue(ui_url: str):
+    """Runs one event through the chat UI's queue (join, then data stream) and waits for it.
+
+    An empty "Read Aloud" request needs no API keys or audio output, but still travels the
+    same queue as a chat message, so it hangs if the UI is not served by a single process.
+    """
+    from gradio_client import Client
+    job = Client(ui_url, verbose=False).submit("", api_name="/text_to_speech")
+    job.result(timeout=30)
+
+
+def run_load(base_url: str, concurrency: int, duration: float) -> tuple[int, int]:
+    """Hammers /api/search from `concurrency` threads; returns (successes, errors)."""
+    counts = {"ok": 0, "error": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client_thread(offset: int):
+        ok = errors = 0
+        with httpx.Client(base_url=base_url, timeout=30.0) as client:
+            i = offset
+            while time.monotonic() < deadline:
+                try:
+                    response = client.get("/api/search", params={"q": QUERIES[i % len(QUERIES)]})
+                    if response.status_code == 200:
+                        ok += 1
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                i += 1
+        with lock:
+            counts["ok"] += ok
+            counts["error"] += errors
+
+    threads = [threading.Thread(target=client_thread, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts["ok"], counts["error"]
+
+
+def stop_server(server: subprocess.Popen):
+    pids = process_tree(server.pid)
+    server.send_signal(signal.SIGINT)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+    # Don't let a stuck child (e.g. the UI process) keep the HTTP ports for the next run.
+    for pid in pids[1:]:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def benchmark(workers: int, shared_inference: bool, args) -> dict:
+    ui_url = f"http://127.0.0.1:{args.port}"
+    command = [sys.executable, os.path.join(REPO_DIR, "main.py"), "--host", "127.0.0.1", "--port", str(args.port)]
+    if shared_inference:
+        # The API routes are served by the workers, separately from the chat UI.
+        base_url = f"http://127.0.0.1:{args.api_port}"
+        command += ["--shared-inference", "--workers", str(workers), "--api-port", str(args.api_port)]
+    else:
+        base_url = ui_url
+    output = None if args.verbose else subprocess.DEVNULL
+    server = subprocess.Popen(command, cwd=REPO_DIR, stdout=output, stderr=output)
+    try:
+        ready_urls = [f"{ui_url}/", f"{base_url}/api/search?q={QUERIES[0]}"]
+        if not wait_until_ready(ready_urls, server, args.startup_timeout):
+            raise RuntimeError(f"Server with {workers} workers did not become ready.")
+        check_gradio_queue(ui_url)
+        run_load(base_url, args.concurrency, args.warmup)
+        ok, errors = run_load(base_url, args.concurrency, args.duration)
+        rss_mb, pss_mb = tree_memory_mb(server.pid)
+    finally:
+        stop_server(server)
+    layout = "shared" if shared_inference else "single-process"
+    return {"layout": layout, "workers": workers, "rps": ok / args.duration, "errors": errors, "rss_mb": rss_mb, "pss_mb": pss_mb}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark main.py across web worker counts.")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads sending requests.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of measured load per run.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unmeasured load per run.")
+    parser.add_argument("--port", type=int, default=8010, help="Port of the chat UI.")
+    parser.add_argument("--api-port", type=int, default=8011, help="Port of the API workers.")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--verbose", action="store_true", help="Show the server's own output.")
+    args = parser.parse_args()
+
+    print("Benchmarking the single-process baseline...")
+    results = [benchmark(1, False, args)]
+    for workers in range(1, args.max_workers + 1):
+        print(f"Benchmarking {workers} shared-inference worker(s)...")
+        results.append(benchmark(workers, True, args))
+
+    print(f"\n{'Layout':<14} | {'Workers':>7} | {'Req/s':>9} | {'Errors':>6} | {'RSS MB':>9} | {'PSS MB':>9}")
+    print(f"{'-' * 14} | {'-' * 7} | {'-' * 9} | {'-' * 6} | {'-' * 9} | {'-' * 9}")
+    for r in results:
+        print(f"{r['layout']:<14} | {r['workers']:>7} | {r['rps']:>9.1f} | {r['errors']:>6} | {r['rss_mb']:>9.1f} | {r['pss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
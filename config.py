@@ -13,3 +13,10 @@ GROQ_WHISPER_MODEL_ID = "mixtral-8x7b-32768"
 ELEVENLABS_VOICE_ID = "21m00Tcm4TlvDq8ikWAM" # This is the ID for the voice 'Rachel'
 LLAMA_GUARD_MODEL_ID = "meta-llama/llama-guard-4-12b"
 TTS_MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
+# Multi-worker serving (python main.py --workers N)
+INFERENCE_MAX_BATCH_SIZE = 32
+INFERENCE_MAX_BATCH_WAIT_MS = 5
+INFERENCE_REQUEST_TIMEOUT_S = 60
+# Written into a fresh directory per run, which the web workers memory-map.
+FAISS_INDEX_FILENAME = "knowledge.faiss"
+KNOWLEDGE_CHUNKS_FILENAME = "chunks.json"
@@ -0,0 +1,282 @@
+# inference_server.py
+# Shared model process for multi-worker serving. The embedding model and the Piper
+# voice are loaded once here; every web worker talks to it over a local Unix socket.
+import os
+import atexit
+import queue
+import shutil
+import signal
+import secrets
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from itertools import count
+from multiprocessing.connection import Listener, Client
+import numpy as np
+from config import INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_BATCH_WAIT_MS, INFERENCE_REQUEST_TIMEOUT_S
+
+# Set by start_inference_server(); web workers inherit them and switch to the shared models.
+ADDRESS_ENV_VAR = "GRAM_SAHAYAK_INFERENCE_ADDRESS"
+AUTHKEY_ENV_VAR = "GRAM_SAHAYAK_INFERENCE_AUTHKEY"
+INDEX_DIR_ENV_VAR = "GRAM_SAHAYAK_SHARED_INDEX_DIR"
+SOCKET_FILENAME = "inference.sock"
+
+
+def _make_reply(conn, send_lock, request_id):
+    """Returns a callback that sends one response back to the worker that asked for it."""
+    def reply(ok: bool, result):
+        with send_lock:
+            try:
+                conn.send((request_id, ok, result))
+            except (OSError, ValueError):
+                pass  # The web worker has gone away.
+    return reply
+
+
+class InferenceServer:
+    def __init__(self, embedding_model, piper_provider=None):
+        self.embedding_model = embedding_model
+        self.piper_provider = piper_provider
+        self.embed_queue = queue.Queue()
+        self.tts_queue = queue.Queue()
+
+    def serve_forever(self, listener: Listener):
+        threading.Thread(target=self._embed_loop, daemon=True).start()
+        threading.Thread(target=self._tts_loop, daemon=True).start()
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                print(f"⚠️ Inference server rejected a connection: {e}")
+                continue
+            threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn):
+        """Reads requests from one web worker and hands them to the model loops."""
+        send_lock = threading.Lock()
+        while True:
+            try:
+                request_id, op, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            reply = _make_reply(conn, send_lock, request_id)
+            if op == "encode":
+                self.embed_queue.put((reply, payload))
+            elif op == "synthesize":
+                self.tts_queue.put((reply, payload))
+            elif op == "info":
+                reply(True, {"tts": self.piper_provider is not None})
+            else:
+                reply(False, f"Unknown inference operation '{op}'.")
+        conn.close()
+
+    def _next_embed_batch(self) -> list:
+        """Blocks for one request, then keeps collecting until the batch is full or the wait runs out."""
+        batch = [self.embed_queue.get()]
+        size = len(batch[0][1])
+        deadline = time.monotonic() + INFERENCE_MAX_BATCH_WAIT_MS / 1000
+        while size < INFERENCE_MAX_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self.embed_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(job)
+            size += len(job[1])
+        return batch
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        embeddings = self.embedding_model.encode(texts, batch_size=INFERENCE_MAX_BATCH_SIZE)
+        return np.asarray(embeddings, dtype="float32")
+
+    def _embed_loop(self):
+        while True:
+            batch = self._next_embed_batch()
+            texts = [text for _, job_texts in batch for text in job_texts]
+            try:
+                embeddings = self._encode(texts)
+            except Exception as e:
+                print(f"⚠️ Batched embedding of {len(texts)} texts failed, retrying each request alone: {e}")
+                self._embed_one_by_one(batch)
+                continue
+            offset = 0
+            for reply, job_texts in batch:
+                reply(True, embeddings[offset:offset + len(job_texts)])
+                offset += len(job_texts)
+
+    def _embed_one_by_one(self, batch: list):
+        """Encodes each request separately, so only the one that broke the batch gets the error."""
+        for reply, job_texts in batch:
+            try:
+                reply(True, self._encode(job_texts))
+            except Exception as e:
+                reply(False, str(e))
+
+    def _tts_loop(self):
+        # Piper synthesizes one utterance at a time, so requests are served in arrival order.
+        while True:
+            reply, text = self.tts_queue.get()
+            if self.piper_provider is None:
+                reply(False, "Piper voice is not loaded in the inference server.")
+                continue
+            try:
+                reply(True, self.piper_provider.synthesize(text))
+            except Exception as e:
+                reply(False, str(e))
+
+
+def run_inference_server(ready_conn, run_dir: str, authkey: bytes):
+    """Entry point of the inference process: loads the models, publishes the index, then serves."""
+    # Ctrl+C reaches the whole process group. Ignore it here so this process keeps serving
+    # while the parent drains in-flight requests, and is stopped by the daemon terminate.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # The models must load locally here, not proxy back to ourselves.
+    os.environ.pop(ADDRESS_ENV_VAR, None)
+    os.environ.pop(AUTHKEY_ENV_VAR, None)
+    os.environ.pop(INDEX_DIR_ENV_VAR, None)
+    from knowledge_base_manager import kb_manager
+    from tts_handler import tts_handler, PiperProvider
+
+    kb_manager.save_index(run_dir)
+    piper_provider = next((p for p in tts_handler.providers if isinstance(p, PiperProvider)), None)
+    server = InferenceServer(kb_manager.embedding_model, piper_provider)
+    address = os.path.join(run_dir, SOCKET_FILENAME)
+    with Listener(address, family="AF_UNIX", authkey=authkey) as listener:
+        print(f"✅ Inference server listening on {address}.")
+        ready_conn.send(True)
+        ready_conn.close()
+        server.serve_forever(listener)
+
+
+_shutting_down = False
+
+def _mark_shutting_down():
+    global _shutting_down
+    _shutting_down = True
+
+def _watch_process(process, description: str):
+    process.join()
+    if _shutting_down:
+        return
+    print(f"❌ {description} exited unexpectedly (exit code {process.exitcode}). Shutting down.")
+    os.kill(os.getpid(), signal.SIGTERM)
+
+def watch_process(process, description: str):
+    """Takes the whole server down if a child process dies, rather than leaving it half-working."""
+    # Registered after multiprocessing's own exit hook, so it runs first and the
+    # watcher ignores daemon processes being terminated on a normal exit.
+    atexit.register(_mark_shutting_down)
+    threading.Thread(target=_watch_process, args=(process, description), daemon=True).start()
+
+
+def start_inference_server():
+    """Starts the shared inference process and blocks until it accepts connections."""
+    # The socket and the published index live in a fresh directory per run, so several
+    # instances (or a leftover one) never collide or rewrite each other's mapped index.
+    run_dir = tempfile.mkdtemp(prefix="gram-sahayak-")
+    atexit.register(shutil.rmtree, run_dir, ignore_errors=True)
+    authkey = secrets.token_bytes(16)
+    ctx = multiprocessing.get_context("spawn")
+    ready_recv, ready_send = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=run_inference_server, args=(ready_send, run_dir, authkey),
+                          name="gram-sahayak-inference", daemon=True)
+    process.start()
+    ready_send.close()
+    try:
+        ready_recv.recv()
+    except EOFError:
+        raise RuntimeError("Inference server exited before it became ready.")
+    os.environ[ADDRESS_ENV_VAR] = os.path.join(run_dir, SOCKET_FILENAME)
+    os.environ[AUTHKEY_ENV_VAR] = authkey.hex()
+    os.environ[INDEX_DIR_ENV_VAR] = run_dir
+    watch_process(process, "Inference server")
+    return process
+
+
+class InferenceClient:
+    def __init__(self, address: str, authkey: bytes):
+        self.conn = Client(address, family="AF_UNIX", authkey=authkey)
+        self.send_lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+        self.pending = {}
+        self.request_ids = count()
+        self.closed = False
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def _read_loop(self):
+        """Routes each response to the caller waiting on it, so one connection serves every thread."""
+        while True:
+            try:
+                request_id, ok, result = self.conn.recv()
+            except (EOFError, OSError):
+                print("❌ Lost connection to the inference server.")
+                break
+            with self.pending_lock:
+                future = self.pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+        with self.pending_lock:
+            self.closed = True
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_exception(ConnectionError("Lost connection to the inference server."))
+
+    def _call(self, op: str, payload=None):
+        future = Future()
+        with self.pending_lock:
+            if self.closed:
+                raise ConnectionError("Lost connection to the inference server.")
+            request_id = next(self.request_ids)
+            self.pending[request_id] = future
+        try:
+            with self.send_lock:
+                self.conn.send((request_id, op, payload))
+        except Exception:
+            with self.pending_lock:
+                self.pending.pop(request_id, None)
+            raise
+        try:
+            return future.result(timeout=INFERENCE_REQUEST_TIMEOUT_S)
+        except FutureTimeoutError:
+            with self.pending_lock:
+                self.pending.pop(request_id, None)
+            raise TimeoutError(f"Inference server did not answer '{op}' within {INFERENCE_REQUEST_TIMEOUT_S}s.")
+
+    def encode(self, sentences: list[str]) -> np.ndarray:
+        """Same call shape as SentenceTransformer.encode for a list of sentences."""
+        return self._call("encode", list(sentences))
+
+    def synthesize(self, text: str) -> bytes:
+        return self._call("synthesize", text)
+
+    def info(self) -> dict:
+        return self._call("info")
+
+
+def get_shared_index_dir() -> str:
+    """Directory holding the index the inference server published for this run."""
+    return os.environ[INDEX_DIR_ENV_VAR]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_inference_client():
+    """Returns this process's client for the shared inference server, or None when running standalone."""
+    global _client
+    address = os.environ.get(ADDRESS_ENV_VAR)
+    authkey = os.environ.get(AUTHKEY_ENV_VAR)
+    if not address or not authkey:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient(address, bytes.fromhex(authkey))
+    return _client
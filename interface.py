@@ -1,14 +1,11 @@
 # interface.py - The Final, Correct, and Simplified Version
 import gradio as gr
 import os
-import torch
 from threading import Thread
 import pysbd
 from llm_handler import llm_handler
 from knowledge_base_manager import kb_manager
 from langchain_core.messages import HumanMessage, AIMessage
-from TTS.api import TTS
-from config import TTS_MODEL_NAME, SPEAKER_VOICE_DIR
 from agent import agent_app
 from tts_handler import tts_handler
 
@@ -1,18 +1,27 @@
 # knowledge_base_manager.py
 import os
+import json
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from config import KNOWLEDGE_BASE_DIR, EMBEDDING_MODEL_NAME
+from config import KNOWLEDGE_BASE_DIR, EMBEDDING_MODEL_NAME, FAISS_INDEX_FILENAME, KNOWLEDGE_CHUNKS_FILENAME
+from inference_server import get_inference_client, get_shared_index_dir
 
 class KnowledgeBaseManager:
     def __init__(self):
         print("Setting up the Knowledge Base...")
-        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-        self.knowledge_chunks = self._load_knowledge()
-        if not self.knowledge_chunks:
-            raise ValueError("Knowledge base is empty.")
-        self.index = self._create_faiss_index()
+        inference_client = get_inference_client()
+        if inference_client is not None:
+            # Multi-worker mode: queries are embedded by the shared inference server and
+            # the index it published is mapped read-only instead of rebuilt per worker.
+            self.embedding_model = inference_client
+            self.knowledge_chunks, self.index = self._load_shared_index(get_shared_index_dir())
+        else:
+            from sentence_transformers import SentenceTransformer
+            self.embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+            self.knowledge_chunks = self._load_knowledge()
+            if not self.knowledge_chunks:
+                raise ValueError("Knowledge base is empty.")
+            self.index = self._create_faiss_index()
         print("✅ Knowledge Base is ready!")
 
     def _load_knowledge(self) -> list[str]:
@@ -34,6 +43,29 @@ class KnowledgeBaseManager:
         index.add(np.array(embeddings).astype('float32'))
         return index
 
+    def _load_shared_index(self, index_dir: str):
+        with open(os.path.join(index_dir, KNOWLEDGE_CHUNKS_FILENAME), "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        # IO_FLAG_MMAP_IFC (faiss >= 1.11) maps flat indexes. Older releases only map IVF lists,
+        # so each worker would get its own private copy of the vectors.
+        mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+        if mmap_flag is None:
+            print(f"⚠️ faiss {faiss.__version__} cannot memory-map flat indexes. Each worker will hold "
+                  "its own copy of the index; install faiss-cpu>=1.11.0 to share it.")
+            mmap_flag = faiss.IO_FLAG_MMAP
+        index = faiss.read_index(os.path.join(index_dir, FAISS_INDEX_FILENAME), mmap_flag | faiss.IO_FLAG_READ_ONLY)
+        return chunks, index
+
+    def save_index(self, index_dir: str):
+        """Writes the index and its chunks for the web workers to map.
+
+        index_dir must be new for every run: rewriting an index file that a running worker
+        has memory-mapped crashes that worker with SIGBUS.
+        """
+        faiss.write_index(self.index, os.path.join(index_dir, FAISS_INDEX_FILENAME))
+        with open(os.path.join(index_dir, KNOWLEDGE_CHUNKS_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(self.knowledge_chunks, f, ensure_ascii=False)
+
     def search(self, query: str, k: int = 1) -> str:
         query_embedding = self.embedding_model.encode([query])
         _, I = self.index.search(np.array(query_embedding).astype('float32'), k=k)
@@ -1,17 +1,92 @@
 # main.py
+import os
+import time
+import argparse
+import threading
+import multiprocessing
 import uvicorn
 from fastapi import FastAPI
-import gradio as gr
-from interface import AssistantInterface
 
-app = FastAPI(title="Gram Sahayak Main App")
+def create_api_app(title: str = "Gram Sahayak API") -> FastAPI:
+    """Stateless API routes. Safe to serve from any number of web workers."""
+    from knowledge_base_manager import kb_manager
 
-assistant = AssistantInterface()
-chat_ui = assistant.build_ui()
+    app = FastAPI(title=title)
 
-app = gr.mount_gradio_app(app, chat_ui, path="/")
+    @app.get("/api/search")
+    def search_knowledge_base(q: str):
+        return {"query": q, "result": kb_manager.search(q)}
+
+    return app
+
+def create_app() -> FastAPI:
+    """The full app: API routes plus the Gradio chat UI. Heavy imports stay in here."""
+    import gradio as gr
+    from interface import AssistantInterface
+
+    app = create_api_app(title="Gram Sahayak Main App")
+
+    assistant = AssistantInterface()
+    chat_ui = assistant.build_ui()
+
+    return gr.mount_gradio_app(app, chat_ui, path="/")
+
+def run_ui_server(ready_conn, host: str, port: int):
+    # Gradio keeps its event queue and gr.State in process memory, so the chat UI
+    # must always be served by exactly one process.
+    # Leave Ctrl+C to the parent, which terminates this process once it has shut down.
+    os.setpgrp()
+    server = uvicorn.Server(uvicorn.Config(create_app(), host=host, port=port))
+
+    def report_ready():
+        while not server.started:
+            time.sleep(0.1)
+        ready_conn.send(True)
+        ready_conn.close()
+
+    threading.Thread(target=report_ready, daemon=True).start()
+    server.run()
+
+def start_ui_server(host: str, port: int):
+    """Starts the chat UI process and blocks until it is listening."""
+    from inference_server import watch_process
+
+    ctx = multiprocessing.get_context("spawn")
+    ready_recv, ready_send = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=run_ui_server, args=(ready_send, host, port),
+                          name="gram-sahayak-ui", daemon=True)
+    process.start()
+    ready_send.close()
+    try:
+        ready_recv.recv()
+    except EOFError:
+        raise RuntimeError("Chat UI exited before it became ready.")
+    watch_process(process, "Chat UI")
+    return process
 
 if __name__ == "__main__":
-    print("🚀 Gram Sahayak is LIVE!")
-    print("   Go to http://127.0.0.1:8000 to start talking.")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    parser = argparse.ArgumentParser(description="Run the Gram Sahayak server.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000, help="Port of the chat UI.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="API worker processes. Above 1, the embedding model and Piper voice "
+                             "are loaded once in a shared inference process.")
+    parser.add_argument("--shared-inference", action="store_true",
+                        help="Use the shared inference process and separate API workers even with one worker.")
+    parser.add_argument("--api-port", type=int, default=8001,
+                        help="Port of the API workers in shared-inference mode.")
+    args = parser.parse_args()
+
+    if args.workers > 1 or args.shared_inference:
+        from inference_server import start_inference_server
+        start_inference_server()
+        start_ui_server(args.host, args.port)
+        print(f"🚀 Gram Sahayak is LIVE with {args.workers} API workers!")
+        print(f"   Go to http://127.0.0.1:{args.port} to start talking.")
+        print(f"   API workers are on http://127.0.0.1:{args.api_port}/api/search")
+        uvicorn.run("main:create_api_app", factory=True, host=args.host, port=args.api_port, workers=args.workers)
+    else:
+        app = create_app()
+        print("🚀 Gram Sahayak is LIVE!")
+        print(f"   Go to http://127.0.0.1:{args.port} to start talking.")
+        uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,128 @@
+# tests/test_inference_server.py
+import threading
+from multiprocessing.connection import Listener
+import numpy as np
+import pytest
+import inference_server
+from inference_server import InferenceServer, InferenceClient
+
+AUTHKEY = b"test-authkey"
+
+
+class StubEmbeddingModel:
+    """Embeds each text as [len(text), 1] and records the size of every encode call."""
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        if "bad" in texts:
+            raise ValueError("cannot embed 'bad'")
+        self.calls.append(len(texts))
+        return np.array([[len(text), 1.0] for text in texts])
+
+
+@pytest.fixture
+def socket_address(tmp_path_factory):
+    # Unix socket paths are limited to ~100 characters, so avoid the long per-test tmp_path.
+    return str(tmp_path_factory.mktemp("sock") / "inference.sock")
+
+
+@pytest.fixture
+def model():
+    return StubEmbeddingModel()
+
+
+@pytest.fixture
+def client(model, socket_address):
+    server = InferenceServer(model)
+    listener = Listener(socket_address, family="AF_UNIX", authkey=AUTHKEY)
+    threading.Thread(target=server.serve_forever, args=(listener,), daemon=True).start()
+    return InferenceClient(socket_address, AUTHKEY)
+
+
+def call_concurrently(fn, count):
+    results = {}
+    def run(i):
+        try:
+            results[i] = fn(i)
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_batches_split_at_max_batch_size(model):
+    server = InferenceServer(model)
+    for i in range(inference_server.INFERENCE_MAX_BATCH_SIZE + 8):
+        server.embed_queue.put((lambda ok, result: None, [f"text {i}"]))
+
+    assert len(server._next_embed_batch()) == inference_server.INFERENCE_MAX_BATCH_SIZE
+    assert len(server._next_embed_batch()) == 8
+
+
+def test_each_caller_gets_its_own_slice(client, model, monkeypatch):
+    monkeypatch.setattr(inference_server, "INFERENCE_MAX_BATCH_WAIT_MS", 200)
+
+    # Caller i sends i + 1 texts of lengths i, i + 1, ...
+    results = call_concurrently(lambda i: client.encode(["x" * (i + n) for n in range(i + 1)]), 10)
+
+    for i, embeddings in results.items():
+        assert embeddings.shape == (i + 1, 2)
+        assert embeddings[:, 0].tolist() == [i + n for n in range(i + 1)]
+    assert len(model.calls) < 10  # Requests were coalesced into shared encode calls.
+
+
+def test_bad_request_fails_alone(client, monkeypatch):
+    monkeypatch.setattr(inference_server, "INFERENCE_MAX_BATCH_WAIT_MS", 200)
+
+    results = call_concurrently(lambda i: client.encode(["bad"] if i == 2 else ["x" * i]), 5)
+
+    assert isinstance(results[2], RuntimeError)
+    assert "cannot embed 'bad'" in str(results[2])
+    for i in (0, 1, 3, 4):
+        assert results[i][0, 0] == i
+
+
+def test_tts_without_piper_reports_error(client):
+    assert client.info() == {"tts": False}
+    with pytest.raises(RuntimeError, match="Piper voice is not loaded"):
+        client.synthesize("namaste")
+
+
+def serve_one_request(socket_address, then_close: bool):
+    """A fake server that reads one request and either hangs up or never answers."""
+    listener = Listener(socket_address, family="AF_UNIX", authkey=AUTHKEY)
+    connections = []  # Keeps a silent connection open after serve() returns.
+    def serve():
+        conn = listener.accept()
+        connections.append(conn)
+        conn.recv()
+        if then_close:
+            conn.close()
+    threading.Thread(target=serve, daemon=True).start()
+    return connections
+
+
+def test_pending_calls_fail_when_connection_is_lost(socket_address):
+    serve_one_request(socket_address, then_close=True)
+    client = InferenceClient(socket_address, AUTHKEY)
+
+    with pytest.raises(ConnectionError):
+        client.encode(["x"])
+    with pytest.raises(ConnectionError):
+        client.encode(["y"])
+
+
+def test_call_times_out(socket_address, monkeypatch):
+    monkeypatch.setattr(inference_server, "INFERENCE_REQUEST_TIMEOUT_S", 0.2)
+    connections = serve_one_request(socket_address, then_close=False)
+    client = InferenceClient(socket_address, AUTHKEY)
+
+    with pytest.raises(TimeoutError, match="did not answer 'encode'"):
+        client.encode(["x"])
+    assert client.pending == {}
+    assert len(connections) == 1
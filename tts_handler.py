@@ -9,7 +9,7 @@ import soundfile as sf
 from threading import Thread
 from abc import ABC, abstractmethod
 from dotenv import load_dotenv
-from piper.voice import PiperVoice
+from inference_server import get_inference_client
 
 load_dotenv()
 
@@ -51,6 +51,7 @@ class OpenAITTSProvider(BaseTTSProvider):
 # --- New Local Piper Provider (Unchanged) ---
 class PiperProvider(BaseTTSProvider):
     def __init__(self, model_path, config_path):
+        from piper.voice import PiperVoice
         print("Initializing local Piper TTS Provider...")
         self.voice = PiperVoice.load(model_path=model_path, config_path=config_path)
         self.sample_rate = self.voice.config.sample_rate
@@ -63,6 +64,13 @@ class PiperProvider(BaseTTSProvider):
         buffer.seek(0)
         return buffer.read()
 
+class RemotePiperProvider(BaseTTSProvider):
+    """Piper voice hosted by the shared inference server (multi-worker mode)."""
+    def __init__(self, inference_client):
+        self.inference_client = inference_client
+    def synthesize(self, text: str) -> bytes:
+        return self.inference_client.synthesize(text)
+
 # --- Unified TTS Handler (Now uses config from top of file) ---
 class TTSHandler:
     def __init__(self):
@@ -74,6 +82,23 @@ class TTSHandler:
 
     def _initialize_providers(self):
         provider_instances = []
+        inference_client = get_inference_client()
+        if inference_client is not None:
+            if inference_client.info()["tts"]:
+                provider_instances.append(RemotePiperProvider(inference_client))
+            else:
+                print("⚠️ Inference server has no Piper voice loaded.")
+        else:
+            provider_instances.extend(self._load_local_piper())
+
+        if os.environ.get("ELEVENLABS_API_KEY"):
+            provider_instances.append(ElevenLabsProvider())
+        if os.environ.get("OPENAI_API_KEY"):
+            provider_instances.append(OpenAITTSProvider())
+            
+        return provider_instances
+
+    def _load_local_piper(self):
         try:
             MODEL_FOLDER = "local_tts_models"
             # This line now uses the variables from the top of the file
@@ -82,18 +107,11 @@ class TTSHandler:
             JSON_PATH = f"{MODEL_PATH}.json"
             
             if os.path.exists(MODEL_PATH) and os.path.exists(JSON_PATH):
-                provider_instances.append(PiperProvider(MODEL_PATH, JSON_PATH))
-            else:
-                print(f"⚠️ Piper model files not found for '{SPEAKER}'. Expected at {MODEL_PATH}")
+                return [PiperProvider(MODEL_PATH, JSON_PATH)]
+            print(f"⚠️ Piper model files not found for '{SPEAKER}'. Expected at {MODEL_PATH}")
         except Exception as e:
             print(f"⚠️ Could not initialize PiperProvider: {e}")
-
-        if os.environ.get("ELEVENLABS_API_KEY"):
-            provider_instances.append(ElevenLabsProvider())
-        if os.environ.get("OPENAI_API_KEY"):
-            provider_instances.append(OpenAITTSProvider())
-            
-        return provider_instances
+        return []
 
     def speak(self, text: str):
         """Generates and plays audio sentence-by-sentence."""